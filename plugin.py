@@ -1,12 +1,62 @@
 import sublime
 import sublime_plugin
 import os
+import sys
 import re
+import bisect
+import functools
+import time
 import json
 import webbrowser
 
-REQUIRE_REGEXP = '(require\s*\(?\s*[\'"])(.+?)[\'"]\s*\)?'
-IMPORT_REGEXP = '((?:(?:import\s*(?:(?:.|\n)*?)(?:from)?)|(?:export\s*(?:(?:.|\n)+?)(?:from))\s*)[\'"])(.+?)[\'"]'
+REQUIRE_REGEXP = r'''(require\s*\(?\s*['"])(.+?)['"]\s*\)?'''
+# A quote that is not closed on its own line, e.g. an apostrophe in a comment
+LONE_QUOTE_REGEXP = r'''['"][^'"\n]*\n'''
+
+# An import runs up to its first quote, or if that does not open a module string, up to
+# the quote after a later from, skipping only quotes which are not closed on their line.
+# An export always needs the from. The classes never run over a closed string, so the
+# engine cannot backtrack into the following statements.
+# The keywords must not be part of a word, a property or a string, and an import stops
+# before a require, so a stray "import" cannot swallow the require statement after it.
+IMPORT_REGEXP = (
+  r'''((?:(?<![\w$.'"])import\b(?:(?:(?!require\b)[^'"])*'''
+  r'''|(?:(?!require\b)(?:[^'"]|''' + LONE_QUOTE_REGEXP + r'''))*?from\s*)'''
+  r'''|(?<![\w$.'"])export\b(?:[^'"]|''' + LONE_QUOTE_REGEXP + r''')+?from\s*)['"])(.+?)['"]'''
+)
+
+# Both statements in one pass: groups 1 and 2 belong to require, 3 and 4 to import
+STATEMENT_REGEXP = '(?:' + REQUIRE_REGEXP + ')|(?:' + IMPORT_REGEXP + ')'
+
+STATEMENT_RE = re.compile(STATEMENT_REGEXP)
+SETTLED_RE = re.compile(r'\S')
+
+# Cached statement regions by view id, see find_regions()
+view_regions = {}
+
+# Modifications since the last scan by view id, see record_modification()
+view_edits = {}
+
+# The state before the running text command by view id, see record_command()
+_pending_commands = {}
+
+# Text commands which only modify the text at their single selection
+TYPING_COMMANDS = frozenset(['insert', 'insert_snippet', 'left_delete', 'right_delete', 'delete_word', 'paste'])
+
+EDIT_HISTORY_SIZE = 64
+
+CORE_MODULE_HELP_URL = 'https://nodejs.org/api/%s.html'
+NPM_PACKAGE_URL = 'https://www.npmjs.com/package/'
+IMPORT_ALIASES_HELP_URL = 'https://github.com/hajnalben/ClickableRequires#webpack-or-other-module-handlers'
+
+# Views smaller than this many characters are scanned with STATEMENT_RE instead of find_all
+FINDITER_MAX_SIZE = 256 * 1024
+
+# Characters read behind the modifications at first when rescanning, see _update_regions()
+RESCAN_WINDOW = 4 * 1024
+
+# Milliseconds to wait after the last modification before scanning the view again
+REFRESH_DELAY = 200
 
 class EsFoldImportsListener(sublime_plugin.EventListener):
 
@@ -16,9 +66,7 @@ class EsFoldImportsListener(sublime_plugin.EventListener):
 
     filename = view.file_name()
 
-    exts = get_setting('extensions')
-
-    if filename.endswith(tuple(exts)):
+    if filename.endswith(get_extensions()):
       view.run_command('es_fold_imports')
 
 class EsFoldImportsCommand(sublime_plugin.TextCommand):
@@ -52,21 +100,12 @@ class OpenRequireUnderCursorCommand(sublime_plugin.TextCommand):
 
   def run(self, edit):
     view = self.view
-
-    self._search_statements(view, REQUIRE_REGEXP) or \
-      self._search_statements(view, IMPORT_REGEXP)
-
-  def _search_statements(self, view, regexp):
     cursor_position = view.sel()[0]
-    matches = view.find_all(regexp)
+    region = find_region_at(view, cursor_position.begin())
 
-    for match in matches:
-      if cursor_position.intersects(match):
-        statement = view.substr(match)
-        matcher = re.match(regexp, statement)
-        module = matcher.group(len(matcher.groups()))
-        open_module_file(view.window(), module)
-        return True
+    if region and cursor_position.intersects(region['statement']):
+      open_module_file(view.window(), region['module'])
+      return True
 
 # |--------------------------------------------------------------------------
 # | This command is responsible for coloring the import and require statements
@@ -75,11 +114,28 @@ class OpenRequireUnderCursorCommand(sublime_plugin.TextCommand):
 class RequireEventListener(sublime_plugin.EventListener):
 
   def on_load_async(self, view):
-    self._delete_cached_regions(view)
-    self._underline_regions(view)
+    delete_cached_regions(view)
+    sublime.set_timeout_async(lambda: self._underline_regions(view), 0)
+
+  ## The selection is only meaningful right before and after the command, so these run on the main thread.
+  def on_text_command(self, view, command_name, args):
+    record_command(view, command_name)
+
+  def on_post_text_command(self, view, command_name, args):
+    _pending_commands.pop(view.id(), None)
+
+  def on_modified(self, view):
+    record_modification(view)
 
   def on_modified_async(self, view):
-    self._delete_cached_regions(view)
+    change_count = view.change_count()
+    sublime.set_timeout_async(lambda: self._maybe_refresh(view, change_count), REFRESH_DELAY)
+
+  ## Refreshes the underlines only if the view was not modified again since then.
+  def _maybe_refresh(self, view, change_count):
+    if not view.is_valid() or view.change_count() != change_count:
+      return
+
     self._underline_regions(view)
 
   def on_hover(self, view, point, hover_zone):
@@ -87,65 +143,31 @@ class RequireEventListener(sublime_plugin.EventListener):
       or not self._assert_in_right_file(view):
       return
 
-    regions = self._find_regions(view)
-
-    for region in regions:
-      if region['region'].contains(point):
-        return self._show_popup(view, region, point)
-
-  def on_pre_close(self, view):
-    self._delete_cached_regions(view)
-
-  def _delete_cached_regions(self, view):
-    if (hasattr(self, 'view_regions')) and (view.id() in self.view_regions):
-      del self.view_regions[view.id()]
-
-  ## Retrieves the regions from the current view containing import or require statements.
-  def _find_regions(self, view):
-    if not hasattr(self, 'view_regions'):
-      self.view_regions = {}
-
-    if view.id() in self.view_regions:
-      return self.view_regions[view.id()]
-
-    regions = []
-
-    require_regions = view.find_all(REQUIRE_REGEXP)
+    region = find_region_at(view, point)
 
-    for region in require_regions:
-      statement = view.substr(region)
-      match = re.match(REQUIRE_REGEXP, statement)
+    if region and region['region'].contains(point):
+      return self._show_popup(view, region, point)
 
-      module = match.group(len(match.groups()))
+  def on_post_save_async(self, view):
+    invalidate_resolution_cache()
 
-      region.a += len(match.group(1))
-      region.b = region.a + len(module)
+    if view.file_name():
+      invalidate_negative_lookups(view.file_name())
 
-      regions.append({ 'region': region, 'module': module, 'type': 'require' })
-
-    import_regions = view.find_all(IMPORT_REGEXP)
-
-    for region in import_regions:
-      statement = view.substr(region)
-      match = re.match(IMPORT_REGEXP, statement)
-
-      module = match.group(len(match.groups()))
-
-      region.a += len(match.group(1))
-      region.b = region.a + len(module)
-
-      regions.append({ 'region': region, 'module': module, 'type': 'import'  })
-
-    self.view_regions[view.id()] = regions
-
-    return regions
+  def on_pre_close(self, view):
+    delete_cached_regions(view)
+    view_edits.pop(view.id(), None)
+    _pending_commands.pop(view.id(), None)
+    invalidate_resolution_cache()
 
+  ## Scans the view on the async thread and hands the regions over to the main thread.
   def _underline_regions(self, view):
     if not self._assert_in_right_file(view):
       log('Skipping non js file')
       return
 
-    regions = self._find_regions(view)
+    change_count = view.change_count()
+    regions = find_regions(view)
     regions = list(map(lambda x: x['region'], regions))
     scope = get_setting('scope')
     icon = get_setting('icon')
@@ -156,7 +178,14 @@ class RequireEventListener(sublime_plugin.EventListener):
     if underline:
       underline_bitmask |= sublime.DRAW_STIPPLED_UNDERLINE
 
-    view.add_regions('requires', regions, scope, icon, underline_bitmask)
+    sublime.set_timeout(lambda: self._apply_regions(view, change_count, regions, scope, icon, underline_bitmask), 0)
+
+  def _apply_regions(self, view, change_count, regions, scope, icon, flags):
+    # A newer refresh is already scheduled if the view was modified during the scan
+    if not view.is_valid() or view.change_count() != change_count:
+      return
+
+    view.add_regions('requires', regions, scope, icon, flags)
 
   def _show_popup(self, view, region, point):
     window = view.window()
@@ -164,51 +193,262 @@ class RequireEventListener(sublime_plugin.EventListener):
 
     file = find_module(window, module)
 
-    link = 'Module: <a href="%s">%s</a>' % (module, module)
+    link = ['Module: <a href="%s">%s</a>' % (module, module)]
 
     if module in CORE_MODULES:
-      link += ' (opens browser)'
-      description = '<p>Node.js core module</p>'
+      link.append(' (opens browser)')
+      description = ['<p>Node.js core module</p>']
     elif not file:
-      link = ''
-      description = '<p>Module cannot be found!</p>'
+      link = []
+      description = ['<p>Module cannot be found!</p>']
       if not window.active_view().settings().get('webpack_resolve_modules'):
-        description += '<br/><a href="help_%s">Setup import aliases</a>' % 'https://github.com/hajnalben/ClickableRequires#webpack-or-other-module-handlers'
+        description.append('<br/><a href="help_%s">Setup import aliases</a>' % IMPORT_ALIASES_HELP_URL)
     else:
-      description = '<p>Found at: %s</p>' % file
+      description = ['<p>Found at: %s</p>' % file]
       if not module.startswith('.'):
-        description += '<br/><a href="npm_%s">View on npmjs.com</a>' % module.split('/')[0]
+        description.append('<br/><a href="npm_%s">View on npmjs.com</a>' % module.split('/')[0])
 
-    html = link + description
+    description = ''.join(description)
+    html = ''.join(link) + description
     width = (len(description) - 5) * 10
     view.show_popup(html, sublime.HIDE_ON_MOUSE_MOVE_AWAY, point, width, on_navigate = lambda module: self._on_anchor_clicked(window, module))
 
   def _on_anchor_clicked(self, window, module):
     if module.startswith('npm_'):
-      return webbrowser.open('https://www.npmjs.com/package/' + module[len('npm_'):], autoraise=True)
+      return webbrowser.open(NPM_PACKAGE_URL + module[len('npm_'):], autoraise=True)
     elif module.startswith('help_'):
       return webbrowser.open(module[len('help_'):], autoraise=True)
     open_module_file(window, module)
 
   def _assert_in_right_file(self, view):
-    window = view.window()
-    if not window: return False
+    if not view.window(): return False
 
-    ctx = window.extract_variables()
-    if not 'file_name' in ctx: return False
-    file_name = ctx['file_name']
+    file_name = view.file_name()
 
-    exts = get_setting('extensions')
-
-    if not file_name.endswith(tuple(exts)):
-      return False
-
-    return True
+    return bool(file_name) and file_name.endswith(get_extensions())
 
 # |--------------------------------------------------------------------------
 # | Global functions
 # |--------------------------------------------------------------------------
 
+## Retrieves the regions from the current view containing import or require statements.
+## The results are cached per view until the view is modified or closed.
+def find_regions(view):
+  return _cached_regions(view)['regions']
+
+## Returns the statement starting closest before the given point, if any.
+## The caller still has to check if the point is really inside of it.
+def find_region_at(view, point):
+  cache = _cached_regions(view)
+  i = bisect.bisect_right(cache['starts'], point) - 1
+
+  if i < 0:
+    return None
+
+  return cache['regions'][i]
+
+def _cached_regions(view):
+  cache = view_regions.get(view.id())
+  change_count = view.change_count()
+
+  if cache and cache['change_count'] == change_count:
+    return cache
+
+  # Read before scanning, the view can still be modified while the scan runs
+  size = view.size()
+
+  # The view was modified since the last scan, try to rescan only around the edit
+  regions = cache and _update_regions(view, cache, change_count, size)
+
+  if regions is None:
+    regions = _scan_regions(view)
+
+  cache = {
+    'regions': regions,
+    'starts': [x['statement'].begin() for x in regions],
+    'change_count': change_count,
+    'size': size
+  }
+
+  # A scan overlapped by a modification may not match the counted state, so it is not kept
+  if view.change_count() == change_count:
+    view_regions[view.id()] = cache
+    view_edits[view.id()] = [x for x in view_edits.get(view.id(), []) if x['after'] > change_count]
+
+  return cache
+
+## Rescans the view from before the modifications recorded since the last scan, see
+## record_modification(). The cached statements before that point are kept. Once the
+## rescan meets a cached statement again behind the modifications, the rest of the cache
+## is reused, shifted by the size difference of the buffer. The text is read in growing
+## windows, so only around the modifications is copied out of the view.
+## Returns None if a modification was not recorded and the whole view has to be scanned.
+def _update_regions(view, cache, change_count, size):
+  edits = [x for x in list(view_edits.get(view.id(), ())) if cache['change_count'] < x['after'] <= change_count]
+
+  # Every modification since the last scan has to be accounted for
+  expected = cache['change_count']
+  for edit in edits:
+    if edit['before'] != expected:
+      return None
+    expected = edit['after']
+
+  if not edits or expected != change_count:
+    return None
+
+  # Merge into one range: the text before begin is unchanged, and so is the text from end on,
+  # apart from being shifted by delta
+  begin, end, delta = edits[0]['begin'], edits[0]['end'], edits[0]['delta']
+  for edit in edits[1:]:
+    begin = min(begin, edit['begin'])
+    end = max(end + edit['delta'], edit['end'])
+    delta += edit['delta']
+
+  if delta != size - cache['size']:
+    return None
+
+  regions, starts = cache['regions'], cache['starts']
+
+  # A failed match attempt never reads past the closed module string of the next statement,
+  # so the scan before the end of a statement is unaffected if its line ends before begin
+  first = bisect.bisect_left(starts, begin)
+  while first > 0 and view.line(regions[first - 1]['statement'].end()).end() >= begin:
+    first -= 1
+
+  restart = regions[first - 1]['statement'].end() if first > 0 else 0
+
+  rescanned = []
+  pos = restart
+  window = RESCAN_WINDOW
+  window_end = min(size, max(pos, end) + window)
+
+  while True:
+    # The character before pos is kept for the lookbehinds of IMPORT_REGEXP
+    offset = max(0, pos - 1)
+    text = view.substr(sublime.Region(offset, window_end))
+
+    for match in STATEMENT_RE.finditer(text, pos - offset):
+      # Unless the window reaches the end of the view, a match is only the one a full scan
+      # finds once the text behind it is settled: the optional suffix of REQUIRE_REGEXP
+      # has met a non blank character and its line, within which a failed attempt can
+      # still read, ends inside the window
+      if window_end < size:
+        settled = SETTLED_RE.search(text, match.end())
+        if not settled or text.find('\n', settled.start()) == -1:
+          break
+
+      region = _match_region(match, offset)
+      start = region['statement'].begin()
+
+      # Behind the modifications the text is the old one, so the old scan continues from here
+      if start >= end:
+        i = bisect.bisect_left(starts, start - delta)
+        if i < len(starts) and starts[i] == start - delta:
+          return regions[:first] + rescanned + [_shift_region(x, delta) for x in regions[i:]]
+
+      rescanned.append(region)
+      pos = region['statement'].end()
+
+    if window_end == size:
+      return regions[:first] + rescanned
+
+    # No rejoin inside the window: read on from the last settled statement with a larger one,
+    # up to the size from which the whole view is better left to find_all
+    window *= 2
+    window_end = min(size, max(pos, end) + window)
+
+    if size >= FINDITER_MAX_SIZE and window_end - restart > FINDITER_MAX_SIZE:
+      return None
+
+## Scans the whole view in one pass. Smaller views are copied out and matched in Python,
+## which gives the group offsets directly. Larger ones are left to find_all, where each
+## statement is extracted as its module name and its prefix separated by a new line,
+## which the module name cannot contain. So no second match is needed.
+def _scan_regions(view):
+  if view.size() < FINDITER_MAX_SIZE:
+    text = view.substr(sublime.Region(0, view.size()))
+    return [_match_region(match, 0) for match in STATEMENT_RE.finditer(text)]
+
+  extractions = []
+  # find_all returns the matches in document order, so the list is sorted by start
+  statements = view.find_all(STATEMENT_REGEXP, 0, '$2$4\n$1$3', extractions)
+
+  return [_extracted_region(statement, extracted) for statement, extracted in zip(statements, extractions)]
+
+def _extracted_region(statement, extracted):
+  module, _, prefix = extracted.partition('\n')
+
+  type = 'require' if prefix.startswith('require') else 'import'
+
+  begin = statement.a + len(prefix)
+  module_region = sublime.Region(begin, begin + len(module))
+
+  return { 'region': module_region, 'statement': statement, 'module': module, 'type': type }
+
+## Builds a region entry from a match of STATEMENT_RE found at the given offset of the view.
+def _match_region(match, offset):
+  # The module group of the matching alternative
+  type, group = ('require', 2) if match.start(1) != -1 else ('import', 4)
+
+  module = match.group(group)
+  module_region = sublime.Region(offset + match.start(group), offset + match.end(group))
+  statement = sublime.Region(offset + match.start(), offset + match.end())
+
+  return { 'region': module_region, 'statement': statement, 'module': module, 'type': type }
+
+def _shift_region(region, delta):
+  if delta == 0:
+    return region
+
+  shifted = dict(region)
+  shifted['region'] = sublime.Region(region['region'].a + delta, region['region'].b + delta)
+  shifted['statement'] = sublime.Region(region['statement'].a + delta, region['statement'].b + delta)
+
+  return shifted
+
+def delete_cached_regions(view):
+  view_regions.pop(view.id(), None)
+
+## Remembers the state before a text command, so the modification it makes can be located.
+def record_command(view, command_name):
+  selection = view.sel()
+  region = selection[0] if len(selection) == 1 else None
+
+  _pending_commands[view.id()] = (command_name, view.change_count(), view.size(), region)
+
+## Records the lines changed by a modification, see _update_regions(). Only typing commands
+## with a single selection can be located, anything else (plugins, undo, multiple cursors)
+## is recorded without a range, which makes the next lookup scan the whole view.
+def record_modification(view):
+  edits = view_edits.setdefault(view.id(), [])
+
+  # Too many to be worth replaying, the gap makes the next lookup scan the whole view
+  if len(edits) >= EDIT_HISTORY_SIZE:
+    del edits[:]
+
+  change_count = view.change_count()
+  edit = { 'before': None, 'after': change_count }
+
+  # A command is only trusted with one modification
+  pending = _pending_commands.pop(view.id(), None)
+  selection = view.sel()
+
+  if pending and len(selection) == 1:
+    command_name, before, size, pre = pending
+
+    if command_name in TYPING_COMMANDS and pre is not None and change_count == before + 1:
+      post = selection[0]
+      delta = view.size() - size
+
+      # The text replaced the selection and ended up around the cursor, the whole lines
+      # are taken to cover auto indentation and whitespace trimming too
+      edit['before'] = before
+      edit['begin'] = view.line(min(pre.begin(), post.begin())).begin()
+      edit['end'] = view.line(max(post.end(), pre.end() + delta)).end()
+      edit['delta'] = delta
+
+  edits.append(edit)
+
 def open_module_file(window, module):
   file = find_module(window, module)
 
@@ -217,22 +457,27 @@ def open_module_file(window, module):
     if get_setting('reveal_in_side_bar'):
       sublime.set_timeout(lambda: window.run_command('reveal_in_side_bar'), 100)
   else:
-    webbrowser.open('https://nodejs.org/api/%s.html' % module, autoraise=True)
+    webbrowser.open(CORE_MODULE_HELP_URL % module, autoraise=True)
 
 def find_module(window, module):
   ctx = window.extract_variables()
-  file_path = ctx['file_path']
+  settings = window.active_view().settings()
+
+  webpack_modules = tuple(settings.get('webpack_resolve_modules') or ())
+  webpack_extensions = tuple(settings.get('webpack_resolve_extensions') or get_resolve_extensions())
 
-  match = find_require_module(module, file_path)
+  return resolve_module(module, ctx['file_path'], ctx.get('project_path'), webpack_modules, webpack_extensions, get_resolve_extensions())
+
+## The resolution only depends on its (hashable) arguments and the file system,
+## so the results are kept until invalidate_resolution_cache() is called.
+@functools.lru_cache(maxsize = 4096)
+def resolve_module(module, file_path, project_path, webpack_modules, webpack_extensions, extensions):
+  match = find_require_module(module, file_path, extensions)
 
   if match:
     log('Found require module: ', match)
 
   if not match or not returnIfFile(match):
-    project_path = ctx['project_path']
-    webpack_modules = window.active_view().settings().get('webpack_resolve_modules')
-    webpack_extensions = window.active_view().settings().get('webpack_resolve_extensions') or get_setting('resolve_extensions')
-
     match = find_import_module(module, project_path, webpack_modules, webpack_extensions)
 
     if match:
@@ -240,6 +485,12 @@ def find_module(window, module):
 
   return returnIfFile(match)
 
+def invalidate_resolution_cache():
+  resolve_module.cache_clear()
+  package_main.cache_clear()
+  _isfile_cache.clear()
+  _isdir_cache.clear()
+
 
 def find_import_module(module, project_path, webpack_modules, webpack_extensions):
   if not webpack_modules:
@@ -274,15 +525,15 @@ require(X) from module at path Y
   4. LOAD_NODE_MODULES(X, dirname(Y))
   5. THROW "not found"
 """
-def find_require_module(module, file_path):
+def find_require_module(module, file_path, extensions):
   if module in CORE_MODULES:
     return module
 
   if module.startswith('.'):
     path = os.path.normpath(os.path.join(file_path, module))
-    return load_as_file(path) or load_as_directory(path)
+    return load_as_file(path, extensions) or load_as_directory(path, extensions)
 
-  return load_node_modules(module, file_path)
+  return load_node_modules(module, file_path, extensions)
 
 """
 LOAD_AS_FILE(X)
@@ -291,14 +542,14 @@ LOAD_AS_FILE(X)
   3. If X.json is a file, parse X.json to a JavaScript Object.  STOP
   4. If X.node is a file, load X.node as binary addon.  STOP
 """
-def load_as_file(path):
+def load_as_file(path, extensions):
   log('load_as_file: ', path)
 
   file = returnIfFile(path)
 
   if file: return file
 
-  for extension in get_setting('resolve_extensions'):
+  for extension in extensions:
     file = returnIfFile(path + extension)
     if file: return file
 
@@ -311,17 +562,35 @@ LOAD_AS_DIRECTORY(X)
      d. LOAD_INDEX(M)
   2. LOAD_INDEX(X)
 """
-def load_as_directory(path):
+def load_as_directory(path, extensions):
   log('load_as_directory: ', path)
   package_path = returnIfFile(path, 'package.json')
   if package_path:
-    with open(package_path, 'r', encoding='UTF-8') as package_json_contents:
-      package_json = json.load(package_json_contents)
-      main = package_json.get('main', 'index.js')
-      main_path = os.path.join(path, main)
-      return load_as_file(main_path) or load_index(main_path)
+    main_path = os.path.join(path, package_main(package_path))
+    return load_as_file(main_path, extensions) or load_index(main_path, extensions)
   else:
-    return load_index(path)
+    return load_index(path, extensions)
+
+PACKAGE_MAIN_RE = re.compile(rb'"main"\s*:\s*"([^"\\]+)"')
+
+## Only the "main" field is needed, so it is looked up without parsing the whole manifest.
+@functools.lru_cache(maxsize = 1024)
+def package_main(package_path):
+  with open(package_path, 'rb') as package_json_contents:
+    data = package_json_contents.read()
+
+  count = data.count(b'"main"')
+
+  if count == 0:
+    return 'index.js'
+
+  # Only a single key right inside the outermost object is taken, otherwise let the
+  # json parser decide, as it also has to for escaped values
+  match = count == 1 and PACKAGE_MAIN_RE.search(data)
+  if match and data.count(b'{', 0, match.start()) - data.count(b'}', 0, match.start()) == 1:
+    return match.group(1).decode('UTF-8')
+
+  return json.loads(data.decode('UTF-8')).get('main', 'index.js')
 
 """
 LOAD_INDEX(X)
@@ -329,10 +598,10 @@ LOAD_INDEX(X)
   2. If X/index.json is a file, parse X/index.json to a JavaScript object. STOP
   3. If X/index.node is a file, load X/index.node as binary addon.  STOP
 """
-def load_index(path):
+def load_index(path, extensions):
   log('load_index: ', path)
 
-  for extension in get_setting('resolve_extensions'):
+  for extension in extensions:
     file = returnIfFile(path, 'index' + extension)
     if file: return file
 
@@ -343,15 +612,46 @@ LOAD_NODE_MODULES(X, START)
      a. LOAD_AS_FILE(DIR/X)
      b. LOAD_AS_DIRECTORY(DIR/X)
 """
-def load_node_modules(module, start):
+def load_node_modules(module, start, extensions):
   log('load_node_modules: ', module, ' - ', start)
+
+  # resolve_module() already caches misses, but it is cleared completely on each save and close.
+  # The misses that the saved file cannot affect are kept here for a while to bridge that.
+  now = time.monotonic()
+  missed = _negative_lookups.get((module, start))
+  if missed is not None and now - missed < NEGATIVE_LOOKUP_TTL:
+    return
+
   dirs = node_modules_paths(start)
   for dir in dirs:
+    # Don't probe every extension inside of a missing node_modules folder
+    if not _isdir(dir): continue
+
     path = os.path.join(dir, module)
-    file = load_as_file(path) or load_as_directory(path)
+    file = load_as_file(path, extensions) or load_as_directory(path, extensions)
     # Return only if the file is found!
     if file: return file
 
+  if len(_negative_lookups) >= NEGATIVE_LOOKUP_SIZE:
+    _negative_lookups.clear()
+
+  _negative_lookups[(module, start)] = now
+
+NEGATIVE_LOOKUP_TTL = 2.0
+NEGATIVE_LOOKUP_SIZE = 4096
+
+# Timestamps of the failed node_modules lookups by (module, start)
+_negative_lookups = {}
+
+## Forgets the failed lookups which could have found the given file.
+def invalidate_negative_lookups(file_name):
+  for key in list(_negative_lookups):
+    if any(file_name.startswith(os.path.join(dir, '')) for dir in node_modules_paths(key[1])):
+      # The hover thread may have cleared the dict meanwhile
+      _negative_lookups.pop(key, None)
+
+NODE_MODULES = sys.intern('node_modules')
+
 """
 NODE_MODULES_PATHS(START)
   1. let PARTS = path split(START)
@@ -364,52 +664,39 @@ NODE_MODULES_PATHS(START)
      d. let I = I - 1
   5. return DIRS
 """
+@functools.lru_cache(maxsize = 1024)
 def node_modules_paths(start):
   log('node_modules_paths: ', start)
   parts = split_path(start)
   i = len(parts) - 1
   dirs = []
   while i >= 0:
-    if parts[i] is 'node_modules':
+    if parts[i] == NODE_MODULES:
       i = i - 1
       continue
 
-    _parts = (parts[:i + 1] + ['node_modules'])
+    _parts = (parts[:i + 1] + [NODE_MODULES])
     dir = os.path.join(*_parts)
     dirs.append(dir)
     i = i - 1
-  return dirs
+  # The result is cached, so it must not be mutated by the callers
+  return tuple(dirs)
 
 def split_path(start):
-  path = os.path.normpath(start)
+  drive, path = os.path.splitdrive(os.path.normpath(start))
 
-  drive, path_and_file = os.path.splitdrive(path)
-  path, file = os.path.split(path_and_file)
+  parts = [folder for folder in path.split(os.sep) if folder]
 
-  folders = [file]
-
-  while 1:
-    path, folder = os.path.split(path)
-
-    if folder != "":
-      folders.append(folder)
-    else:
-      if path != "":
-        folders.append(path)
+  if path.startswith(os.sep):
+    parts.insert(0, os.sep)
 
-      break
-
-  folders.reverse()
-
-  parts = folders
-
-  if (drive):
-    parts = [drive] + parts
+  if drive:
+    parts.insert(0, drive)
 
   return parts
 
 # Run in terminal: node -pe "require('repl')._builtinLibs"
-CORE_MODULES = [
+CORE_MODULES = frozenset([
   'assert',
   'buffer',
   'child_process',
@@ -438,7 +725,7 @@ CORE_MODULES = [
   'v8',
   'vm',
   'zlib'
-]
+])
 
 # |--------------------------------------------------------------------------
 # | Utility functions
@@ -446,8 +733,58 @@ CORE_MODULES = [
 
 SETTINGS_FILE = 'ClickableRequires.sublime-settings'
 
+_settings = None
+_setting_values = {}
+
 def get_setting(name, default = None):
-  return sublime.load_settings(SETTINGS_FILE).get(name, default)
+  global _settings
+
+  if _settings is None:
+    _settings = sublime.load_settings(SETTINGS_FILE)
+    _settings.add_on_change('clickable_requires', _on_settings_change)
+
+  if name not in _setting_values:
+    _setting_values[name] = _settings.get(name)
+
+  value = _setting_values[name]
+
+  return default if value is None else value
+
+_exts_tuple = None
+_resolve_exts_tuple = None
+
+## The allowed file extensions as a tuple ready for str.endswith()
+def get_extensions():
+  global _exts_tuple
+
+  if _exts_tuple is None:
+    _exts_tuple = tuple(get_setting('extensions', []))
+
+  return _exts_tuple
+
+def get_resolve_extensions():
+  global _resolve_exts_tuple
+
+  if _resolve_exts_tuple is None:
+    _resolve_exts_tuple = tuple(get_setting('resolve_extensions', []))
+
+  return _resolve_exts_tuple
+
+def plugin_unloaded():
+  # Don't leave the callback of this module behind when the plugin is reloaded
+  if _settings:
+    _settings.clear_on_change('clickable_requires')
+
+## Drops every value derived from the settings file once it changes.
+def _on_settings_change():
+  global _exts_tuple, _resolve_exts_tuple
+
+  _setting_values.clear()
+  _exts_tuple = None
+  _resolve_exts_tuple = None
+
+  invalidate_resolution_cache()
+  _negative_lookups.clear()
 
 def log(*str):
   if get_setting('debug'): print(*str)
@@ -461,5 +798,35 @@ def returnIfFile(path, file = None):
   if file:
     _file = os.path.join(path, file)
 
-  if os.path.isfile(_file):
-    return _file
\ No newline at end of file
+  if _isfile(_file):
+    return _file
+
+# Short lived os.path.isfile results, the same paths are probed many times during one resolution
+ISFILE_CACHE_TTL = 0.5
+ISFILE_CACHE_SIZE = 4096
+
+_isfile_cache = {}
+
+def _isfile(path):
+  now = time.monotonic()
+  entry = _isfile_cache.get(path)
+
+  if entry and now - entry[0] < ISFILE_CACHE_TTL:
+    return entry[1]
+
+  if len(_isfile_cache) >= ISFILE_CACHE_SIZE:
+    _isfile_cache.clear()
+
+  result = os.path.isfile(path)
+  _isfile_cache[path] = (now, result)
+
+  return result
+
+# The existence of the node_modules folders, kept until the resolution cache is invalidated
+_isdir_cache = {}
+
+def _isdir(path):
+  if path not in _isdir_cache:
+    _isdir_cache[path] = os.path.isdir(path)
+
+  return _isdir_cache[path]